@@ -1,21 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta, date
 from snowflake.snowpark.context import get_active_session
 import json
 from collections import defaultdict
+from itertools import chain
 import _snowflake
 from io import BytesIO
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-import plotly.io as pio
-import base64
+from concurrent.futures import ThreadPoolExecutor
 
 
 
@@ -36,10 +29,36 @@ DB_SCHEMA = "GRP17_LAB_DB.PS_USER_BEHAVIOR"
 AGENT_NAME = "SNOWPATROL_AGENT"
 AGENT_DATABASE = "SNOWFLAKE_INTELLIGENCE"
 AGENT_SCHEMA = "AGENTS"
+STREAM_RENDER_EVERY = 20
+AGENT_HISTORY_LIMIT = 20
+AGENT_CONTEXT_MESSAGES = 6
+AGENT_THREAD_ORIGIN = "snowpatrol"
 
 DATA_MIN_DATE = date(2025, 8, 18)
 DATA_MAX_DATE = date(2025, 9, 18)
 
+QUERY_CACHE_TTL = 300
+DATAFRAME_PAGE_SIZE = 100
+COST_ROW_LIMIT = 1000
+RECOMMENDATIONS_PAGE_SIZE = 20
+
+# st.fragment landed in Streamlit 1.37; use st.experimental_fragment on 1.33-1.36,
+# and on older runtimes leave the function undecorated so it reruns with the page
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", lambda f: f)
+
+PRIORITY_ICONS = {'High Priority': '🔴', 'Medium Priority': '🟡', 'Low Priority': '🟢'}
+PRIORITY_COLORS = {'High Priority': 'red', 'Medium Priority': 'orange', 'Low Priority': 'yellow'}
+
+SECURITY_RISK_COLORS = {
+    'Low Risk': 'green',
+    'Medium Risk - Some Failed Attempts': 'orange',
+    'High Risk - Multiple Failed Logins': 'red'
+}
+ANOMALY_RISK_COLORS = {'Low Risk': 'green', 'Medium Risk': 'orange', 'High Risk': 'red'}
+BAR_LAYOUT = dict(height=400, showlegend=False)
+CHART_LAYOUT = dict(height=400)
+TALL_BAR_LAYOUT = dict(height=500, showlegend=False)
+
 
 
 st.sidebar.title("📊 Navigation")
@@ -53,24 +72,31 @@ st.sidebar.markdown("---")
 st.sidebar.markdown("### 📅 Date Range Filter")
 st.sidebar.info("**Available Data:** Aug 18 - Sep 18, 2025 (32 days)")
 
-col1, col2 = st.sidebar.columns(2)
-with col1:
-    start_date = st.date_input(
-        "Start Date",
-        value=DATA_MIN_DATE,
-        min_value=DATA_MIN_DATE,
-        max_value=DATA_MAX_DATE,
-        help="Select the start date for analysis"
-    )
+st.session_state.setdefault("start_date", DATA_MIN_DATE)
+st.session_state.setdefault("end_date", DATA_MAX_DATE)
 
-with col2:
-    end_date = st.date_input(
-        "End Date", 
-        value=DATA_MAX_DATE,
-        min_value=DATA_MIN_DATE,
-        max_value=DATA_MAX_DATE,
-        help="Select the end date for analysis"
-    )
+# Dates only apply on submit, so adjusting both costs a single rerun
+with st.sidebar.form("date_filter"):
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input(
+            "Start Date",
+            min_value=DATA_MIN_DATE,
+            max_value=DATA_MAX_DATE,
+            help="Select the start date for analysis",
+            key="start_date"
+        )
+    
+    with col2:
+        end_date = st.date_input(
+            "End Date",
+            min_value=DATA_MIN_DATE,
+            max_value=DATA_MAX_DATE,
+            help="Select the end date for analysis",
+            key="end_date"
+        )
+    
+    st.form_submit_button("Apply", use_container_width=True)
 
 if start_date > end_date:
     st.sidebar.error("⚠️ Start date must be before end date")
@@ -98,14 +124,53 @@ def inject_context_into_message(user_message, page_context, data_summary):
 """
     return context_prefix
 
+def to_agent_message(msg):
+    return {"role": msg["role"], "content": [{"type": "text", "text": msg["text"]}]}
+
+def create_agent_thread():
+    resp = _snowflake.send_snow_api_request(
+        "POST",
+        "/api/v2/cortex/threads",
+        {},
+        {},
+        {"origin_application": AGENT_THREAD_ORIGIN},
+        None,
+        10_000
+    )
+    if resp["status"] != 200:
+        error_details = f"Status: {resp['status']}, Reason: {resp.get('reason')}, Content: {resp.get('content', '')[:500]}"
+        raise Exception(f"Cortex HTTP {resp['status']} – {error_details}")
+    content = json.loads(resp["content"])
+    return content.get("thread_id") if isinstance(content, dict) else content
+
 def agent_run():
     api_endpoint = f"/api/v2/databases/{AGENT_DATABASE}/schemas/{AGENT_SCHEMA}/agents/{AGENT_NAME}:run"
     request_headers = {"Accept": "application/json, text/event-stream"}
     
+    # Only a created thread is remembered, so a failed attempt is retried on the next send
+    if st.session_state.get("agent_thread_id") is None:
+        try:
+            st.session_state.agent_thread_id = create_agent_thread()
+        except Exception as e:
+            st.warning(f"Could not create agent thread, sending recent turns instead: {str(e)}")
+    
+    thread_id = st.session_state.get("agent_thread_id")
+    if thread_id is not None:
+        # The agent keeps the history server-side, so only the latest user turn is sent
+        recent_messages = st.session_state.agent_messages[-1:]
+    else:
+        # Only send the most recent turns; the conversation must open with a user message
+        recent_messages = st.session_state.agent_messages[-AGENT_CONTEXT_MESSAGES:]
+        while recent_messages and recent_messages[0]["role"] != "user":
+            recent_messages = recent_messages[1:]
+    
     request_body = {
-        "messages": st.session_state.agent_messages,
+        "messages": [to_agent_message(msg) for msg in recent_messages],
         "tool_choice": {"type": "auto"}
     }
+    if thread_id is not None:
+        request_body["thread_id"] = thread_id
+        request_body["parent_message_id"] = st.session_state.get("agent_parent_message_id", 0)
     
     resp = _snowflake.send_snow_api_request(
         "POST",
@@ -123,117 +188,160 @@ def agent_run():
     
     return resp
 
+def iter_sse_events(raw_content):
+    # Parse Server-Sent Events format lazily so the caller can render as it goes.
+    # Scanning with find() avoids materialising every chunk up front.
+    pos = 0
+    end = len(raw_content)
+    while pos <= end:
+        nxt = raw_content.find("\n\n", pos)
+        if nxt < 0:
+            nxt = end
+        start, pos = pos, nxt + 2
+        if not raw_content.startswith("data:", start, nxt):
+            continue
+        payload = raw_content[start + len("data:"):nxt].strip()
+        if payload and payload != "[DONE]":
+            try:
+                yield json.loads(payload)
+            except json.JSONDecodeError:
+                continue
+
+# Handlers receive the event's "data" payload, or None when it isn't a dict
+
+# Handle response.text.delta events
+def _on_text_delta(ev, data, state):
+    if data is not None:
+        text = data.get("text", "")
+        if text:
+            state["full_text"] += text
+
+# Handle response.text events (complete text)
+def _on_text(ev, data, state):
+    if data is not None:
+        text = data.get("text", "")
+        if text:
+            state["full_text"] = text
+
+# Handle message.delta events (new Cortex Agent API format)
+def _on_message_delta(ev, data, state):
+    if data is None:
+        return
+    delta = data.get("delta", {})
+    if not isinstance(delta, dict):
+        return
+    content_array = delta.get("content", [])
+    if not isinstance(content_array, list):
+        return
+    for content_item in content_array:
+        # Extract text content; tool_use and tool_results are skipped
+        if isinstance(content_item, dict) and content_item.get("type") == "text":
+            text_content = content_item.get("text", "")
+            if text_content:
+                state["full_text"] += text_content
+
+# Handle 'response' event type
+def _on_response(ev, data, state):
+    if data is None:
+        return
+    content = data.get("content", [])
+    if isinstance(content, list):
+        for item in content:
+            if isinstance(item, dict) and item.get("type") == "text":
+                text = item.get("text", "")
+                if text:
+                    state["full_text"] = text
+
+# Handle legacy format
+def _on_legacy(ev, data, state):
+    # Legacy events may carry choices at the top level, but only when "data" is absent
+    source = ev.get("data", ev)
+    choices = source.get("choices", []) if isinstance(source, dict) else []
+    for choice in choices:
+        if not isinstance(choice, dict):
+            continue
+        delta = choice.get("delta", {})
+        if isinstance(delta, dict) and "content" in delta:
+            state["full_text"] += delta["content"]
+        elif "content" in choice:
+            state["full_text"] += choice["content"]
+    
+    # Also check for direct content in event
+    content = ev.get("content")
+    if isinstance(content, str):
+        state["full_text"] += content
+
+# Handle metadata events carrying the thread message ids
+def _on_metadata(ev, data, state):
+    if data is not None and data.get("role") == "assistant":
+        state["message_id"] = data.get("message_id")
+
+# Marks an empty SSE stream; None can't, since a `data: null` payload decodes to None
+_NO_EVENT = object()
+
+EVENT_HANDLERS = {
+    "metadata": _on_metadata,
+    "response.text.delta": _on_text_delta,
+    "response.text": _on_text,
+    "message.delta": _on_message_delta,
+    "response": _on_response,
+}
+
 def parse_and_display_response(response_data, container):
     try:
         raw_content = response_data["content"]
-        events = []
-        
-        # Parse Server-Sent Events format
-        for chunk in raw_content.split("\n\n"):
-            if not chunk.startswith("data:"):
-                continue
-            payload = chunk[len("data:"):].strip()
-            if payload and payload != "[DONE]":
-                try:
-                    event = json.loads(payload)
-                    events.append(event)
-                except json.JSONDecodeError:
-                    continue
+        events = iter_sse_events(raw_content)
+        first_event = next(events, _NO_EVENT)
         
         # If no events were parsed, try parsing as JSON array
-        if not events:
+        if first_event is _NO_EVENT:
             try:
-                events = json.loads(raw_content)
-                if not isinstance(events, list):
-                    events = [events]
+                parsed = json.loads(raw_content)
+                if not isinstance(parsed, list):
+                    parsed = [parsed]
             except json.JSONDecodeError:
                 container.error("Failed to parse response content")
                 return
+            events = iter(parsed)
+            first_event = parsed[0] if parsed else None
+        else:
+            events = chain([first_event], events)
+        
+        placeholder = container.empty()
+        event_count = 0
         
         # Extract text content from events (matching cortex_agent_service.py logic)
-        full_text = ""
+        state = {"full_text": ""}
+        text_updates = 0
         for ev in events:
+            event_count += 1
             if not isinstance(ev, dict):
                 continue
+            data = ev.get("data")
+            if not isinstance(data, dict):
+                data = None
+            previous_text = state["full_text"]
+            EVENT_HANDLERS.get(ev.get("event"), _on_legacy)(ev, data, state)
             
-            # Handle response.text.delta events
-            if ev.get("event") == "response.text.delta":
-                data = ev.get("data", {})
-                if isinstance(data, dict):
-                    text = data.get("text", "")
-                    if text:
-                        full_text += text
-            
-            # Handle response.text events (complete text)
-            elif ev.get("event") == "response.text":
-                data = ev.get("data", {})
-                if isinstance(data, dict):
-                    text = data.get("text", "")
-                    if text:
-                        full_text = text
-            
-            # Handle message.delta events (new Cortex Agent API format)
-            elif ev.get("event") == "message.delta":
-                data = ev.get("data", {})
-                if isinstance(data, dict):
-                    delta = data.get("delta", {})
-                    if isinstance(delta, dict):
-                        content_array = delta.get("content", [])
-                        if isinstance(content_array, list):
-                            for content_item in content_array:
-                                if isinstance(content_item, dict):
-                                    # Extract text content
-                                    if content_item.get("type") == "text":
-                                        text_content = content_item.get("text", "")
-                                        if text_content:
-                                            full_text += text_content
-                                    # Skip tool_use and tool_results
-                                    elif content_item.get("type") in ["tool_use", "tool_results"]:
-                                        continue
-            
-            # Handle 'response' event type
-            elif ev.get("event") == "response":
-                data = ev.get("data", {})
-                if isinstance(data, dict):
-                    content = data.get("content", [])
-                    if isinstance(content, list):
-                        for item in content:
-                            if isinstance(item, dict) and item.get("type") == "text":
-                                text = item.get("text", "")
-                                if text:
-                                    full_text = text
-            
-            # Handle legacy format
-            else:
-                choices = ev.get("data", ev).get("choices", []) if isinstance(ev.get("data", ev), dict) else []
-                for choice in choices:
-                    if not isinstance(choice, dict):
-                        continue
-                    delta = choice.get("delta", {})
-                    if isinstance(delta, dict) and "content" in delta:
-                        full_text += delta["content"]
-                    elif "content" in choice:
-                        full_text += choice["content"]
-                
-                # Also check for direct content in event
-                if "content" in ev:
-                    content = ev["content"]
-                    if isinstance(content, str):
-                        full_text += content
+            # Show partial output every few text updates instead of only at the end
+            if state["full_text"] != previous_text:
+                text_updates += 1
+                if text_updates % STREAM_RENDER_EVERY == 0:
+                    placeholder.markdown(state["full_text"])
         
+        full_text = state["full_text"]
         if full_text:
-            container.markdown(full_text)
-            # Store assistant response in session state
-            assistant_message = {
-                "role": "assistant",
-                "content": [{"type": "text", "text": full_text}]
-            }
-            st.session_state.agent_messages.append(assistant_message)
+            placeholder.markdown(full_text)
+            # Store assistant response in session state, keeping history bounded
+            st.session_state.agent_messages.append({"role": "assistant", "text": full_text})
+            st.session_state.agent_messages = st.session_state.agent_messages[-AGENT_HISTORY_LIMIT:]
+            if state.get("message_id") is not None:
+                st.session_state.agent_parent_message_id = state["message_id"]
         else:
             container.warning("No text response received from agent.")
             # Debug: show first few events
-            if events:
-                container.info(f"Received {len(events)} events. First event: {str(events[0])[:200]}")
+            if event_count:
+                container.info(f"Received {event_count} events. First event: {str(first_event)[:200]}")
             
     except Exception as e:
         container.error(f"Error parsing response: {str(e)}")
@@ -261,16 +369,15 @@ def render_chat_interface(page_name, data_summary):
         with col2:
             if st.button("Clear", key=f"clear_{page_name}"):
                 st.session_state.agent_messages = []
+                # Start a fresh server-side thread on the next send
+                st.session_state.pop("agent_thread_id", None)
+                st.session_state.pop("agent_parent_message_id", None)
                 st.rerun()
         
         if send_button and user_input:
             context_message = inject_context_into_message(user_input, page_name, data_summary)
             
-            message = {
-                "role": "user",
-                "content": [{"type": "text", "text": context_message}]
-            }
-            st.session_state.agent_messages.append(message)
+            st.session_state.agent_messages.append({"role": "user", "text": context_message})
             
             with st.spinner("Calling agent..."):
                 try:
@@ -285,13 +392,489 @@ def render_chat_interface(page_name, data_summary):
         if st.session_state.agent_messages:
             st.markdown("**Recent Conversation:**")
             for msg in st.session_state.agent_messages[-3:]:
-                if msg.get("role") == "user":
-                    text = msg.get("content", [{}])[0].get("text", "")
-                    st.markdown(f"**You:** {text[:200]}...")
-                else:
-                    for content_item in msg.get("content", []):
-                        if content_item.get("type") == "text":
-                            st.markdown(f"**🤖 Agent:** {content_item.get('text', '')[:200]}...")
+                speaker = "You" if msg.get("role") == "user" else "🤖 Agent"
+                st.markdown(f"**{speaker}:** {msg.get('text', '')[:200]}...")
+
+
+def set_table_page(page_key, page_num):
+    st.session_state[page_key] = page_num
+
+def page_bounds(total_rows, page_name, page_size=DATAFRAME_PAGE_SIZE):
+    page_count = max(1, -(-total_rows // page_size))
+    page_num = min(st.session_state.setdefault(f"pg_{page_name}", 0), page_count - 1)
+    first_row = page_num * page_size
+    return page_num, page_count, first_row, min(first_row + page_size, total_rows)
+
+def render_page_controls(total_rows, page_name, page_size=DATAFRAME_PAGE_SIZE):
+    page_key = f"pg_{page_name}"
+    page_num, page_count, first_row, last_row = page_bounds(total_rows, page_name, page_size)
+    if page_count > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("◀ Previous", key=f"{page_key}_prev", disabled=page_num == 0,
+                      on_click=set_table_page, args=(page_key, page_num - 1))
+        with col2:
+            st.caption(f"Rows {first_row + 1:,}–{last_row:,} of {total_rows:,}")
+        with col3:
+            st.button("Next ▶", key=f"{page_key}_next", disabled=page_num >= page_count - 1,
+                      on_click=set_table_page, args=(page_key, page_num + 1))
+
+def render_paginated_dataframe(df, page_name, height=400):
+    # Only one page of rows is serialized to the browser per rerun
+    _, _, first_row, last_row = page_bounds(len(df), page_name)
+    st.dataframe(df.iloc[first_row:last_row], use_container_width=True, height=height)
+    render_page_controls(len(df), page_name)
+
+
+def downcast_frame(df, categories=(), floats=(), integers=()):
+    # Low-cardinality strings become categoricals and numerics shrink to the smallest dtype
+    for col in categories:
+        df[col] = df[col].astype('category')
+    for col in floats:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    for col in integers:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_home_kpis(start, end):
+    # Single round-trip for all four KPIs
+    kpi_df = session.sql(f"""
+        SELECT 'anomaly' AS K, COUNT(*) AS V FROM {DB_SCHEMA}.VW_ANOMALY_ATTRIBUTION
+        WHERE ANOMALY_DATE BETWEEN ? AND ?
+        UNION ALL
+        SELECT 'recs', COUNT(*) FROM {DB_SCHEMA}.VW_CONTEXTUAL_RECOMMENDATIONS
+        WHERE PRIORITY = 'High Priority' AND EVENT_DATE BETWEEN ? AND ?
+        UNION ALL
+        SELECT 'cost', COALESCE(SUM(TOTAL_DAILY_CREDITS * 2), 0) FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION
+        WHERE COST_DATE BETWEEN ? AND ?
+        UNION ALL
+        SELECT 'sec', COUNT(*) FROM {DB_SCHEMA}.VW_SECURITY_COMPLIANCE
+        WHERE SECURITY_RISK_LEVEL NOT IN ('Low Risk') AND LOGIN_DATE BETWEEN ? AND ?
+    """, params=[start, end] * 4).to_pandas()
+    return dict(zip(kpi_df['K'], kpi_df['V']))
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_top_cost_contributors(start, end):
+    return session.sql(f"""
+        SELECT
+            USER_NAME,
+            ROLE_NAME,
+            SUM(TOTAL_DAILY_CREDITS) as TOTAL_CREDITS,
+            SUM(DAILY_QUERY_COUNT) as TOTAL_QUERIES
+        FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION
+        WHERE COST_DATE BETWEEN ? AND ?
+        GROUP BY USER_NAME, ROLE_NAME
+        ORDER BY TOTAL_CREDITS DESC
+        LIMIT 10
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_security_distribution(start, end):
+    return session.sql(f"""
+        SELECT
+            SECURITY_RISK_LEVEL,
+            COUNT(*) as USER_COUNT
+        FROM {DB_SCHEMA}.VW_SECURITY_COMPLIANCE
+        WHERE LOGIN_DATE BETWEEN ? AND ?
+        GROUP BY SECURITY_RISK_LEVEL
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_recent_high_priority_recommendations(start, end):
+    return session.sql(f"""
+        SELECT
+            EVENT_DATE,
+            RECOMMENDATION_TYPE,
+            USER_NAME,
+            ROLE_NAME,
+            ISSUE_DESCRIPTION,
+            RECOMMENDED_ACTIONS
+        FROM {DB_SCHEMA}.VW_CONTEXTUAL_RECOMMENDATIONS
+        WHERE PRIORITY = 'High Priority'
+            AND EVENT_DATE BETWEEN ? AND ?
+        ORDER BY EVENT_DATE DESC
+        LIMIT 5
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_anomalies(start, end):
+    return session.sql(f"""
+        SELECT
+            ANOMALY_DATE, USER_NAME, ROLE_NAME, WAREHOUSE_NAME,
+            QUERY_COUNT, EXECUTION_TIME_CONTRIBUTION_PCT, RISK_LEVEL,
+            BEHAVIOR_PATTERN, RECOMMENDED_ACTION
+        FROM {DB_SCHEMA}.VW_ANOMALY_ATTRIBUTION
+        WHERE ANOMALY_DATE BETWEEN ? AND ?
+        ORDER BY ANOMALY_DATE DESC, EXECUTION_TIME_CONTRIBUTION_PCT DESC
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_cost(start, end):
+    return session.sql(f"""
+        SELECT
+            COST_DATE, USER_NAME, ROLE_NAME, WAREHOUSE_NAME,
+            TOTAL_DAILY_CREDITS, DAILY_QUERY_COUNT, AVG_QUERY_EXECUTION_TIME
+        FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION
+        WHERE COST_DATE BETWEEN ? AND ?
+        ORDER BY COST_DATE DESC, TOTAL_DAILY_CREDITS DESC
+        LIMIT {COST_ROW_LIMIT}
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_cost_totals(start, end):
+    return session.sql(f"""
+        SELECT
+            SUM(TOTAL_DAILY_CREDITS) as TOTAL_CREDITS,
+            SUM(DAILY_QUERY_COUNT) as TOTAL_QUERIES,
+            COUNT(DISTINCT USER_NAME) as UNIQUE_USERS
+        FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION
+        WHERE COST_DATE BETWEEN ? AND ?
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_top_users(start, end):
+    return session.sql(f"""
+        SELECT
+            USER_NAME,
+            SUM(TOTAL_DAILY_CREDITS) as TOTAL_DAILY_CREDITS
+        FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION
+        WHERE COST_DATE BETWEEN ? AND ?
+        GROUP BY USER_NAME
+        ORDER BY 2 DESC
+        LIMIT 10
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_daily_cost(start, end):
+    return session.sql(f"""
+        SELECT
+            COST_DATE,
+            SUM(TOTAL_DAILY_CREDITS) as TOTAL_DAILY_CREDITS
+        FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION
+        WHERE COST_DATE BETWEEN ? AND ?
+        GROUP BY COST_DATE
+        ORDER BY COST_DATE
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_behavior_summary(start, end):
+    return session.sql(f"""
+        SELECT
+            COUNT(*) as PATTERN_COUNT,
+            COUNT_IF(BEHAVIOR_CLASSIFICATION IN ('Highly Anomalous', 'Anomalous')) as ANOMALOUS_COUNT,
+            COUNT_IF(RISK_LEVEL = 'High Risk') as HIGH_RISK_COUNT,
+            COUNT_IF(TIME_CLASSIFICATION = 'Off Hours') as OFF_HOURS_COUNT,
+            COUNT(DISTINCT USER_NAME) as UNIQUE_USERS
+        FROM {DB_SCHEMA}.VW_BEHAVIORAL_PATTERNS
+        WHERE ACTIVITY_DATE BETWEEN ? AND ?
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_behavior_classifications(start, end):
+    return session.sql(f"""
+        SELECT
+            BEHAVIOR_CLASSIFICATION,
+            COUNT(*) as PATTERN_COUNT
+        FROM {DB_SCHEMA}.VW_BEHAVIORAL_PATTERNS
+        WHERE ACTIVITY_DATE BETWEEN ? AND ?
+        GROUP BY BEHAVIOR_CLASSIFICATION
+        ORDER BY PATTERN_COUNT DESC
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_pattern_types(start, end):
+    return session.sql(f"""
+        SELECT
+            PATTERN_TYPE,
+            COUNT(*) as PATTERN_COUNT
+        FROM {DB_SCHEMA}.VW_BEHAVIORAL_PATTERNS
+        WHERE ACTIVITY_DATE BETWEEN ? AND ?
+        GROUP BY PATTERN_TYPE
+        ORDER BY PATTERN_COUNT DESC
+        LIMIT 10
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_behavioral_patterns(start, end, classifications):
+    # classifications is a tuple so it can take part in the cache key
+    placeholders = ", ".join("?" for _ in classifications)
+    return session.sql(f"""
+        SELECT
+            ACTIVITY_DATE, USER_NAME, ROLE_NAME, ACTIVITY_HOUR,
+            QUERY_COUNT, BEHAVIOR_CLASSIFICATION, PATTERN_TYPE,
+            RISK_LEVEL, RECOMMENDED_ACTION
+        FROM {DB_SCHEMA}.VW_BEHAVIORAL_PATTERNS
+        WHERE ACTIVITY_DATE BETWEEN ? AND ?
+            AND BEHAVIOR_CLASSIFICATION IN ({placeholders})
+        ORDER BY ACTIVITY_DATE DESC, ABS(QUERY_DEVIATION_SCORE) DESC
+        LIMIT 1000
+    """, params=[start, end, *classifications]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_security(start, end):
+    return session.sql(f"""
+        SELECT
+            LOGIN_DATE, USER_NAME, FAILED_LOGINS, MFA_COMPLIANCE_STATUS,
+            PASSWORD_ONLY_LOGINS, SECURITY_RISK_LEVEL
+        FROM {DB_SCHEMA}.VW_SECURITY_COMPLIANCE
+        WHERE LOGIN_DATE BETWEEN ? AND ?
+        ORDER BY LOGIN_DATE DESC, FAILED_LOGINS DESC
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_recommendation_counts(start, end):
+    return session.sql(f"""
+        SELECT
+            PRIORITY,
+            RECOMMENDATION_TYPE,
+            COUNT(*) as REC_COUNT
+        FROM {DB_SCHEMA}.VW_CONTEXTUAL_RECOMMENDATIONS
+        WHERE EVENT_DATE BETWEEN ? AND ?
+        GROUP BY PRIORITY, RECOMMENDATION_TYPE
+        ORDER BY
+            CASE PRIORITY
+                WHEN 'High Priority' THEN 1
+                WHEN 'Medium Priority' THEN 2
+                ELSE 3
+            END
+    """, params=[start, end]).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_recommendations(start, end, priorities):
+    # priorities is a tuple so it can take part in the cache key
+    placeholders = ", ".join("?" for _ in priorities)
+    recs_df = session.sql(f"""
+        SELECT
+            PRIORITY, RECOMMENDATION_TYPE, USER_NAME, EVENT_DATE,
+            ISSUE_DESCRIPTION, RECOMMENDED_ACTIONS
+        FROM {DB_SCHEMA}.VW_CONTEXTUAL_RECOMMENDATIONS
+        WHERE EVENT_DATE BETWEEN ? AND ?
+            AND PRIORITY IN ({placeholders})
+        ORDER BY
+            CASE PRIORITY
+                WHEN 'High Priority' THEN 1
+                WHEN 'Medium Priority' THEN 2
+                ELSE 3
+            END,
+            EVENT_DATE DESC
+    """, params=[start, end, *priorities]).to_pandas()
+    return downcast_frame(recs_df, categories=('PRIORITY', 'RECOMMENDATION_TYPE', 'USER_NAME'))
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_consumption(start, end):
+    consumption_df = session.sql(f"""
+        SELECT
+            ROLE_NAME,
+            TOTAL_QUERIES,
+            GB_DATA_SCANNED,
+            ACTIVE_USERS,
+            DATABASES_ACCESSED
+        FROM {DB_SCHEMA}.VW_DATA_CONSUMPTION_BY_ROLE
+        WHERE USAGE_DATE BETWEEN ? AND ?
+        ORDER BY GB_DATA_SCANNED DESC
+        LIMIT 20
+    """, params=[start, end]).to_pandas()
+    return downcast_frame(consumption_df, floats=('GB_DATA_SCANNED',))
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_data_activity_totals(start, end):
+    return session.sql(f"""
+        SELECT
+            (SELECT COALESCE(SUM(GB_DATA_SCANNED), 0) FROM {DB_SCHEMA}.VW_DATA_CONSUMPTION_BY_ROLE
+             WHERE USAGE_DATE BETWEEN ? AND ?) as TOTAL_GB_SCANNED,
+            (SELECT COALESCE(SUM(TOTAL_ROWS_INSERTED), 0) FROM {DB_SCHEMA}.VW_DATA_WRITE_ACTIVITY_BY_ROLE
+             WHERE ACTIVITY_DATE BETWEEN ? AND ?) as TOTAL_ROWS_INSERTED
+    """, params=[start, end] * 2).to_pandas()
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, show_spinner=False)
+def load_writes(start, end):
+    write_df = session.sql(f"""
+        SELECT
+            ROLE_NAME,
+            TOTAL_WRITE_QUERIES,
+            TOTAL_ROWS_INSERTED,
+            TOTAL_ROWS_UPDATED,
+            GB_WRITTEN_DAILY
+        FROM {DB_SCHEMA}.VW_DATA_WRITE_ACTIVITY_BY_ROLE
+        WHERE ACTIVITY_DATE BETWEEN ? AND ?
+        ORDER BY TOTAL_ROWS_INSERTED DESC
+        LIMIT 20
+    """, params=[start, end]).to_pandas()
+    return downcast_frame(write_df, floats=('GB_WRITTEN_DAILY',), integers=('TOTAL_ROWS_INSERTED', 'TOTAL_ROWS_UPDATED'))
+
+
+@st.cache_data(show_spinner=False)
+def build_top_cost_fig(top_cost_df):
+    fig = px.bar(top_cost_df, x='TOTAL_CREDITS', y='USER_NAME',
+                orientation='h',
+                color='TOTAL_CREDITS',
+                color_continuous_scale='Reds',
+                labels={'TOTAL_CREDITS': 'Total Credits', 'USER_NAME': 'User'})
+    fig.update_layout(**BAR_LAYOUT)
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_home_security_fig(security_df):
+    fig = px.pie(security_df, names='SECURITY_RISK_LEVEL', values='USER_COUNT',
+                color_discrete_map=SECURITY_RISK_COLORS)
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_anomaly_risk_fig(risk_dist):
+    return px.bar(risk_dist, x='Risk Level', y='Count', color='Risk Level',
+                 color_discrete_map=ANOMALY_RISK_COLORS)
+
+@st.cache_data(show_spinner=False)
+def build_anomaly_behavior_fig(behavior_dist):
+    return px.pie(behavior_dist, names='Pattern', values='Count')
+
+@st.cache_data(show_spinner=False)
+def build_cost_top_users_fig(top_users):
+    fig = px.bar(top_users, x='TOTAL_DAILY_CREDITS', y='USER_NAME', orientation='h',
+                color='TOTAL_DAILY_CREDITS', color_continuous_scale='Oranges')
+    fig.update_layout(**BAR_LAYOUT)
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_cost_trend_fig(daily_cost):
+    fig = px.line(daily_cost, x='COST_DATE', y='TOTAL_DAILY_CREDITS',
+                 labels={'TOTAL_DAILY_CREDITS': 'Daily Credits', 'COST_DATE': 'Date'})
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_behavior_classification_fig(behavior_dist):
+    return px.pie(behavior_dist, names='BEHAVIOR_CLASSIFICATION', values='PATTERN_COUNT',
+                 labels={'BEHAVIOR_CLASSIFICATION': 'Classification', 'PATTERN_COUNT': 'Count'})
+
+@st.cache_data(show_spinner=False)
+def build_pattern_types_fig(pattern_types):
+    fig = px.bar(pattern_types, x='PATTERN_COUNT', y='PATTERN_TYPE', orientation='h',
+                labels={'PATTERN_TYPE': 'Pattern', 'PATTERN_COUNT': 'Count'})
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_security_risk_fig(risk_dist):
+    return px.pie(risk_dist, names='Risk Level', values='Count',
+                 color='Risk Level',
+                 color_discrete_map=SECURITY_RISK_COLORS)
+
+@st.cache_data(show_spinner=False)
+def build_failed_logins_fig(daily_failed):
+    fig = px.line(daily_failed, x='LOGIN_DATE', y='FAILED_LOGINS')
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def build_rec_types_fig(type_dist):
+    fig = px.bar(type_dist, x='Count', y='Type', orientation='h')
+    fig.update_layout(**CHART_LAYOUT)
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_priority_pie_fig(priority_dist):
+    return px.pie(priority_dist, names='Priority', values='Count',
+                 color='Priority',
+                 color_discrete_map=PRIORITY_COLORS)
+
+@st.cache_data(show_spinner=False)
+def build_consumption_fig(consumption_df):
+    fig = px.bar(consumption_df, x='GB_DATA_SCANNED', y='ROLE_NAME',
+                orientation='h', color='GB_DATA_SCANNED',
+                color_continuous_scale='Blues')
+    fig.update_layout(**TALL_BAR_LAYOUT)
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_writes_fig(write_df):
+    fig = px.bar(write_df, x='TOTAL_ROWS_INSERTED', y='ROLE_NAME',
+                orientation='h', color='TOTAL_ROWS_INSERTED',
+                color_continuous_scale='Greens')
+    fig.update_layout(**TALL_BAR_LAYOUT)
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode()
+
+
+@st.cache_data(show_spinner=False)
+def summarize_home(anomaly_count, recommendations_count, total_cost, security_issues):
+    return f"""
+    Key Metrics:
+    - Active Anomalies: {anomaly_count}
+    - High Priority Actions: {recommendations_count}
+    - Total Cost: ${total_cost:,.2f} USD
+    - Security Issues: {security_issues}
+    """
+
+@st.cache_data(show_spinner=False)
+def summarize_anomalies(total_contributors, high_risk_count, avg_contribution, top_users):
+    return f"""
+    Anomaly Statistics:
+    - Total Contributors: {total_contributors}
+    - High Risk Contributors: {high_risk_count}
+    - Average Contribution: {avg_contribution:.1f}%
+    - Top 3 Users: {', '.join(top_users)}
+    """
+
+@st.cache_data(show_spinner=False)
+def summarize_cost(total_credits, total_queries, unique_users, top_user, top_user_credits):
+    return f"""
+    Cost Analysis Summary:
+    - Total Credits: {total_credits:,.2f}
+    - Estimated Cost: ${total_credits * 2:,.2f}
+    - Total Queries: {total_queries:,}
+    - Active Users: {unique_users}
+    - Top Cost User: {top_user} ({top_user_credits:.2f} credits)
+    """
+
+@st.cache_data(show_spinner=False)
+def summarize_behavior(anomalous_count, high_risk, off_hours, unique_users, top_pattern):
+    return f"""
+    Behavioral Pattern Summary:
+    - Anomalous Patterns: {anomalous_count}
+    - High Risk Behaviors: {high_risk}
+    - Off-Hours Activity: {off_hours}
+    - Users with Patterns: {unique_users}
+    - Most Common Pattern: {top_pattern}
+    """
+
+@st.cache_data(show_spinner=False)
+def summarize_security(high_risk, total_failed, mfa_disabled, password_issues):
+    return f"""
+    Security Summary:
+    - High Risk Users: {high_risk}
+    - Total Failed Login Attempts: {total_failed}
+    - Users without MFA: {mfa_disabled}
+    - Password Issues: {password_issues}
+    """
+
+@st.cache_data(show_spinner=False)
+def summarize_recommendations(high_priority, medium_priority, low_priority, top_type):
+    return f"""
+    Recommendations Summary:
+    - High Priority: {high_priority}
+    - Medium Priority: {medium_priority}
+    - Low Priority: {low_priority}
+    - Most Common Type: {top_type}
+    """
+
+@st.cache_data(show_spinner=False)
+def summarize_data_activity(top_consumer_role, total_gb_scanned, top_write_role, total_rows_inserted):
+    return f"""
+    Data Activity Summary:
+    - Top Consumer Role: {top_consumer_role}
+    - Total GB Scanned: {total_gb_scanned:,.2f}
+    - Top Write Role: {top_write_role}
+    - Total Rows Inserted: {total_rows_inserted:,.0f}
+    """
 
 
 if page == "🏠 Home":
@@ -300,19 +883,20 @@ if page == "🏠 Home":
     
     col1, col2, col3, col4 = st.columns(4)
     
-    anomaly_count = session.sql(f"SELECT COUNT(*) as cnt FROM {DB_SCHEMA}.VW_ANOMALY_ATTRIBUTION WHERE ANOMALY_DATE BETWEEN '{start_date}' AND '{end_date}'").collect()[0]['CNT']
-    recommendations_count = session.sql(f"SELECT COUNT(*) as cnt FROM {DB_SCHEMA}.VW_CONTEXTUAL_RECOMMENDATIONS WHERE PRIORITY = 'High Priority' AND EVENT_DATE BETWEEN '{start_date}' AND '{end_date}'").collect()[0]['CNT']
-    total_cost_df = session.sql(f"SELECT SUM(TOTAL_DAILY_CREDITS * 2) as total_cost FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION WHERE COST_DATE BETWEEN '{start_date}' AND '{end_date}'").to_pandas()
-    security_issues = session.sql(f"SELECT COUNT(*) as cnt FROM {DB_SCHEMA}.VW_SECURITY_COMPLIANCE WHERE SECURITY_RISK_LEVEL NOT IN ('Low Risk') AND LOGIN_DATE BETWEEN '{start_date}' AND '{end_date}'").collect()[0]['CNT']
-    
+    kpis = load_home_kpis(start_date, end_date)
+
+    anomaly_count = int(kpis.get('anomaly', 0))
+    recommendations_count = int(kpis.get('recs', 0))
+    total_cost = float(kpis.get('cost', 0))
+    security_issues = int(kpis.get('sec', 0))
+
     with col1:
         st.metric("Active Anomalies", f"{anomaly_count:,}", help="Users contributing to detected anomalies")
-    
+
     with col2:
         st.metric("High Priority Actions", f"{recommendations_count:,}", help="Critical recommendations requiring attention")
-    
+
     with col3:
-        total_cost = total_cost_df['TOTAL_COST'].iloc[0] if not total_cost_df.empty else 0
         st.metric("Total Cost (USD)", f"${total_cost:,.2f}", help="Estimated total compute cost")
     
     with col4:
@@ -324,65 +908,27 @@ if page == "🏠 Home":
     
     with col1:
         st.markdown("#### 📈 Top Cost Contributors")
-        top_cost_df = session.sql(f"""
-            SELECT 
-                USER_NAME,
-                ROLE_NAME,
-                SUM(TOTAL_DAILY_CREDITS) as TOTAL_CREDITS,
-                SUM(DAILY_QUERY_COUNT) as TOTAL_QUERIES
-            FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION
-            WHERE COST_DATE BETWEEN '{start_date}' AND '{end_date}'
-            GROUP BY USER_NAME, ROLE_NAME
-            ORDER BY TOTAL_CREDITS DESC
-            LIMIT 10
-        """).to_pandas()
+        top_cost_df = load_top_cost_contributors(start_date, end_date)
         
         if not top_cost_df.empty:
-            fig = px.bar(top_cost_df, x='TOTAL_CREDITS', y='USER_NAME', 
-                        orientation='h', 
-                        color='TOTAL_CREDITS',
-                        color_continuous_scale='Reds',
-                        labels={'TOTAL_CREDITS': 'Total Credits', 'USER_NAME': 'User'})
-            fig.update_layout(height=400, showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = build_top_cost_fig(top_cost_df)
+            st.plotly_chart(fig, use_container_width=True, key="top_cost")
         else:
             st.info("No cost data available for the selected period")
     
     with col2:
         st.markdown("#### 🔐 Security Risk Distribution")
-        security_df = session.sql(f"""
-            SELECT 
-                SECURITY_RISK_LEVEL,
-                COUNT(*) as USER_COUNT
-            FROM {DB_SCHEMA}.VW_SECURITY_COMPLIANCE
-            WHERE LOGIN_DATE BETWEEN '{start_date}' AND '{end_date}'
-            GROUP BY SECURITY_RISK_LEVEL
-        """).to_pandas()
+        security_df = load_security_distribution(start_date, end_date)
         
         if not security_df.empty:
-            fig = px.pie(security_df, names='SECURITY_RISK_LEVEL', values='USER_COUNT',
-                        color_discrete_map={'Low Risk': 'green', 'Medium Risk - Some Failed Attempts': 'orange', 'High Risk - Multiple Failed Logins': 'red'})
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = build_home_security_fig(security_df)
+            st.plotly_chart(fig, use_container_width=True, key="home_security")
         else:
             st.info("No security data available")
     
     st.markdown("---")
     st.markdown("#### 💡 Recent High-Priority Recommendations")
-    recent_recs = session.sql(f"""
-        SELECT 
-            EVENT_DATE,
-            RECOMMENDATION_TYPE,
-            USER_NAME,
-            ROLE_NAME,
-            ISSUE_DESCRIPTION,
-            RECOMMENDED_ACTIONS
-        FROM {DB_SCHEMA}.VW_CONTEXTUAL_RECOMMENDATIONS
-        WHERE PRIORITY = 'High Priority'
-            AND EVENT_DATE BETWEEN '{start_date}' AND '{end_date}'
-        ORDER BY EVENT_DATE DESC
-        LIMIT 5
-    """).to_pandas()
+    recent_recs = load_recent_high_priority_recommendations(start_date, end_date)
     
     if not recent_recs.empty:
         for idx, row in recent_recs.iterrows():
@@ -392,13 +938,7 @@ if page == "🏠 Home":
     else:
         st.success("✅ No high-priority issues detected!")
     
-    data_summary = f"""
-    Key Metrics:
-    - Active Anomalies: {anomaly_count}
-    - High Priority Actions: {recommendations_count}
-    - Total Cost: ${total_cost:,.2f} USD
-    - Security Issues: {security_issues}
-    """
+    data_summary = summarize_home(anomaly_count, recommendations_count, total_cost, security_issues)
     render_chat_interface("Home Dashboard", data_summary)
 
 
@@ -411,24 +951,25 @@ elif page == "⚠️ Anomalies":
     Anomalies indicate unusual spikes in compute usage that exceed forecasted thresholds.
     """)
     
-    anomaly_df = session.sql(f"""
-        SELECT * FROM {DB_SCHEMA}.VW_ANOMALY_ATTRIBUTION
-        WHERE ANOMALY_DATE BETWEEN '{start_date}' AND '{end_date}'
-        ORDER BY ANOMALY_DATE DESC, EXECUTION_TIME_CONTRIBUTION_PCT DESC
-    """).to_pandas()
+    anomaly_df = load_anomalies(start_date, end_date)
     
     if not anomaly_df.empty:
+        # Stats shared by the metrics and the agent summary, computed in one pass each
+        total_contributors = len(anomaly_df)
+        high_risk_mask = anomaly_df['RISK_LEVEL'].str.contains('High Risk', na=False, regex=False)
+        high_risk_count = int(high_risk_mask.sum())
+        avg_contribution = anomaly_df['EXECUTION_TIME_CONTRIBUTION_PCT'].mean()
+        top_users = tuple(anomaly_df.nlargest(3, 'EXECUTION_TIME_CONTRIBUTION_PCT')['USER_NAME'])
+        
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("Total Anomaly Contributors", len(anomaly_df))
+            st.metric("Total Anomaly Contributors", total_contributors)
         
         with col2:
-            high_risk_count = len(anomaly_df[anomaly_df['RISK_LEVEL'].str.contains('High Risk', na=False)])
             st.metric("High Risk Contributors", high_risk_count)
         
         with col3:
-            avg_contribution = anomaly_df['EXECUTION_TIME_CONTRIBUTION_PCT'].mean()
             st.metric("Avg Contribution %", f"{avg_contribution:.1f}%")
         
         st.markdown("---")
@@ -437,18 +978,15 @@ elif page == "⚠️ Anomalies":
         
         with col1:
             st.markdown("#### Risk Level Distribution")
-            risk_dist = anomaly_df['RISK_LEVEL'].value_counts().reset_index()
-            risk_dist.columns = ['Risk Level', 'Count']
-            fig = px.bar(risk_dist, x='Risk Level', y='Count', color='Risk Level',
-                        color_discrete_map={'Low Risk': 'green', 'Medium Risk': 'orange', 'High Risk': 'red'})
-            st.plotly_chart(fig, use_container_width=True)
+            risk_dist = anomaly_df['RISK_LEVEL'].value_counts().rename_axis('Risk Level').reset_index(name='Count')
+            fig = build_anomaly_risk_fig(risk_dist)
+            st.plotly_chart(fig, use_container_width=True, key="anomaly_risk")
         
         with col2:
             st.markdown("#### Behavior Patterns")
-            behavior_dist = anomaly_df['BEHAVIOR_PATTERN'].value_counts().reset_index()
-            behavior_dist.columns = ['Pattern', 'Count']
-            fig = px.pie(behavior_dist, names='Pattern', values='Count')
-            st.plotly_chart(fig, use_container_width=True)
+            behavior_dist = anomaly_df['BEHAVIOR_PATTERN'].value_counts().rename_axis('Pattern').reset_index(name='Count')
+            fig = build_anomaly_behavior_fig(behavior_dist)
+            st.plotly_chart(fig, use_container_width=True, key="anomaly_behavior")
         
         st.markdown("---")
         st.markdown("#### Detailed Anomaly Contributors")
@@ -459,35 +997,29 @@ elif page == "⚠️ Anomalies":
         
         filtered_df = anomaly_df[anomaly_df['RISK_LEVEL'].isin(risk_filter)]
         
-        st.dataframe(
+        render_paginated_dataframe(
             filtered_df[[
                 'ANOMALY_DATE', 'USER_NAME', 'ROLE_NAME', 'WAREHOUSE_NAME',
                 'QUERY_COUNT', 'EXECUTION_TIME_CONTRIBUTION_PCT', 'RISK_LEVEL',
                 'BEHAVIOR_PATTERN', 'RECOMMENDED_ACTION'
             ]],
-            use_container_width=True,
-            height=400
+            "anomalies"
         )
         
-        st.download_button(
-            "📥 Download Anomaly Data",
-            filtered_df.to_csv(index=False),
-            "anomaly_attribution.csv",
-            "text/csv"
-        )
+        # Serialize only on request; the bytes are cached per filtered frame
+        if st.button("📄 Prepare Anomaly Download", key="prepare_anomaly_csv"):
+            st.download_button(
+                "📥 Download Anomaly Data",
+                to_csv_bytes(filtered_df),
+                "anomaly_attribution.csv",
+                "text/csv"
+            )
+        
+        data_summary = summarize_anomalies(total_contributors, high_risk_count, avg_contribution, top_users)
     else:
         st.success("✅ No anomalies detected!")
-    
-    if not anomaly_df.empty:
-        data_summary = f"""
-        Anomaly Statistics:
-        - Total Contributors: {len(anomaly_df)}
-        - High Risk Contributors: {len(anomaly_df[anomaly_df['RISK_LEVEL'].str.contains('High Risk', na=False)])}
-        - Average Contribution: {anomaly_df['EXECUTION_TIME_CONTRIBUTION_PCT'].mean():.1f}%
-        - Top 3 Users: {', '.join(anomaly_df.nlargest(3, 'EXECUTION_TIME_CONTRIBUTION_PCT')['USER_NAME'].tolist())}
-        """
-    else:
         data_summary = "No anomalies detected in the selected date range."
+    
     render_chat_interface("Anomaly Analysis", data_summary)
 
 
@@ -495,17 +1027,14 @@ elif page == "💰 Cost Analysis":
     st.title("💰 Cost Attribution Analysis")
     st.markdown(f"**Date Range:** {start_date.strftime('%b %d')} - {end_date.strftime('%b %d, %Y')}")
     
-    cost_df = session.sql(f"""
-        SELECT * FROM {DB_SCHEMA}.VW_COST_ATTRIBUTION
-        WHERE COST_DATE BETWEEN '{start_date}' AND '{end_date}'
-        ORDER BY COST_DATE DESC, TOTAL_DAILY_CREDITS DESC
-    """).to_pandas()
+    cost_df = load_cost(start_date, end_date)
     
     if not cost_df.empty:
-        total_credits = cost_df['TOTAL_DAILY_CREDITS'].sum()
-        total_queries = cost_df['DAILY_QUERY_COUNT'].sum()
+        totals = load_cost_totals(start_date, end_date).iloc[0]
+        total_credits = float(totals['TOTAL_CREDITS'])
+        total_queries = int(totals['TOTAL_QUERIES'])
         avg_cost_per_query = total_credits / total_queries if total_queries > 0 else 0
-        unique_users = cost_df['USER_NAME'].nunique()
+        unique_users = int(totals['UNIQUE_USERS'])
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -523,34 +1052,26 @@ elif page == "💰 Cost Analysis":
         
         with col1:
             st.markdown("#### Top 10 Users by Cost")
-            top_users = cost_df.groupby('USER_NAME')['TOTAL_DAILY_CREDITS'].sum().nlargest(10).reset_index()
-            fig = px.bar(top_users, x='TOTAL_DAILY_CREDITS', y='USER_NAME', orientation='h',
-                        color='TOTAL_DAILY_CREDITS', color_continuous_scale='Oranges')
-            fig.update_layout(height=400, showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            top_users = load_top_users(start_date, end_date)
+            fig = build_cost_top_users_fig(top_users)
+            st.plotly_chart(fig, use_container_width=True, key="cost_top_users")
         
         with col2:
             st.markdown("#### Cost Trend Over Time")
-            daily_cost = cost_df.groupby('COST_DATE')['TOTAL_DAILY_CREDITS'].sum().reset_index()
-            fig = px.line(daily_cost, x='COST_DATE', y='TOTAL_DAILY_CREDITS',
-                         labels={'TOTAL_DAILY_CREDITS': 'Daily Credits', 'COST_DATE': 'Date'})
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            daily_cost = load_daily_cost(start_date, end_date)
+            fig = build_cost_trend_fig(daily_cost)
+            st.plotly_chart(fig, use_container_width=True, key="cost_trend")
         
         st.markdown("---")
         st.markdown("#### Detailed Cost Breakdown")
-        st.dataframe(cost_df[['COST_DATE', 'USER_NAME', 'ROLE_NAME', 'WAREHOUSE_NAME', 
-                               'TOTAL_DAILY_CREDITS', 'DAILY_QUERY_COUNT', 'AVG_QUERY_EXECUTION_TIME']],
-                    use_container_width=True, height=400)
-        
-        data_summary = f"""
-        Cost Analysis Summary:
-        - Total Credits: {total_credits:,.2f}
-        - Estimated Cost: ${total_credits * 2:,.2f}
-        - Total Queries: {total_queries:,}
-        - Active Users: {unique_users}
-        - Top Cost User: {top_users.iloc[0]['USER_NAME']} ({top_users.iloc[0]['TOTAL_DAILY_CREDITS']:.2f} credits)
-        """
+        if len(cost_df) >= COST_ROW_LIMIT:
+            st.caption(f"Showing the {COST_ROW_LIMIT:,} most recent rows")
+        render_paginated_dataframe(cost_df[['COST_DATE', 'USER_NAME', 'ROLE_NAME', 'WAREHOUSE_NAME',
+                                            'TOTAL_DAILY_CREDITS', 'DAILY_QUERY_COUNT', 'AVG_QUERY_EXECUTION_TIME']],
+                                   "cost")
+        
+        data_summary = summarize_cost(total_credits, total_queries, unique_users,
+                                      top_users['USER_NAME'].iat[0], float(top_users['TOTAL_DAILY_CREDITS'].iat[0]))
     else:
         st.info("No cost data available for the selected period")
         data_summary = "No cost data available in the selected date range."
@@ -562,73 +1083,65 @@ elif page == "👤 Behavioral Patterns":
     st.title("👤 Behavioral Pattern Analysis")
     st.markdown(f"**Date Range:** {start_date.strftime('%b %d')} - {end_date.strftime('%b %d, %Y')}")
     
-    patterns_df = session.sql(f"""
-        SELECT * FROM {DB_SCHEMA}.VW_BEHAVIORAL_PATTERNS
-        WHERE ACTIVITY_DATE BETWEEN '{start_date}' AND '{end_date}'
-        ORDER BY ACTIVITY_DATE DESC, ABS(QUERY_DEVIATION_SCORE) DESC
-        LIMIT 1000
-    """).to_pandas()
+    behavior_summary = load_behavior_summary(start_date, end_date).iloc[0]
     
-    if not patterns_df.empty:
+    if behavior_summary['PATTERN_COUNT'] > 0:
+        anomalous_count = int(behavior_summary['ANOMALOUS_COUNT'])
+        high_risk = int(behavior_summary['HIGH_RISK_COUNT'])
+        off_hours = int(behavior_summary['OFF_HOURS_COUNT'])
+        unique_users = int(behavior_summary['UNIQUE_USERS'])
+        
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            anomalous_count = len(patterns_df[patterns_df['BEHAVIOR_CLASSIFICATION'].isin(['Highly Anomalous', 'Anomalous'])])
             st.metric("Anomalous Patterns", anomalous_count)
         
         with col2:
-            high_risk = len(patterns_df[patterns_df['RISK_LEVEL'] == 'High Risk'])
             st.metric("High Risk Behaviors", high_risk)
         
         with col3:
-            off_hours = len(patterns_df[patterns_df['TIME_CLASSIFICATION'] == 'Off Hours'])
             st.metric("Off-Hours Activity", off_hours)
         
         with col4:
-            unique_users = patterns_df['USER_NAME'].nunique()
             st.metric("Users with Patterns", unique_users)
         
         st.markdown("---")
         
         col1, col2 = st.columns(2)
         
+        behavior_dist = load_behavior_classifications(start_date, end_date)
+        pattern_types = load_pattern_types(start_date, end_date)
+        
         with col1:
             st.markdown("#### Behavior Classification")
-            behavior_dist = patterns_df['BEHAVIOR_CLASSIFICATION'].value_counts().reset_index()
-            behavior_dist.columns = ['Classification', 'Count']
-            fig = px.pie(behavior_dist, names='Classification', values='Count')
-            st.plotly_chart(fig, use_container_width=True)
+            fig = build_behavior_classification_fig(behavior_dist)
+            st.plotly_chart(fig, use_container_width=True, key="behavior_classification")
         
         with col2:
             st.markdown("#### Pattern Types")
-            pattern_types = patterns_df['PATTERN_TYPE'].value_counts().head(10).reset_index()
-            pattern_types.columns = ['Pattern', 'Count']
-            fig = px.bar(pattern_types, x='Count', y='Pattern', orientation='h')
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = build_pattern_types_fig(pattern_types)
+            st.plotly_chart(fig, use_container_width=True, key="pattern_types")
         
         st.markdown("---")
         st.markdown("#### Detailed Behavioral Patterns")
         
+        classifications = behavior_dist['BEHAVIOR_CLASSIFICATION'].tolist()
         classification_filter = st.multiselect("Filter by Classification:",
-                                               options=patterns_df['BEHAVIOR_CLASSIFICATION'].unique(),
-                                               default=patterns_df['BEHAVIOR_CLASSIFICATION'].unique())
-        
-        filtered_df = patterns_df[patterns_df['BEHAVIOR_CLASSIFICATION'].isin(classification_filter)]
-        
-        st.dataframe(filtered_df[['ACTIVITY_DATE', 'USER_NAME', 'ROLE_NAME', 'ACTIVITY_HOUR',
-                                   'QUERY_COUNT', 'BEHAVIOR_CLASSIFICATION', 'PATTERN_TYPE',
-                                   'RISK_LEVEL', 'RECOMMENDED_ACTION']],
-                    use_container_width=True, height=400)
-        
-        data_summary = f"""
-        Behavioral Pattern Summary:
-        - Anomalous Patterns: {anomalous_count}
-        - High Risk Behaviors: {high_risk}
-        - Off-Hours Activity: {off_hours}
-        - Users with Patterns: {unique_users}
-        - Most Common Pattern: {patterns_df['PATTERN_TYPE'].value_counts().index[0]}
-        """
+                                               options=classifications,
+                                               default=classifications)
+        
+        if classification_filter:
+            filtered_df = load_behavioral_patterns(start_date, end_date, tuple(sorted(classification_filter)))
+            
+            render_paginated_dataframe(filtered_df[['ACTIVITY_DATE', 'USER_NAME', 'ROLE_NAME', 'ACTIVITY_HOUR',
+                                                    'QUERY_COUNT', 'BEHAVIOR_CLASSIFICATION', 'PATTERN_TYPE',
+                                                    'RISK_LEVEL', 'RECOMMENDED_ACTION']],
+                                       "behavior")
+        else:
+            st.info("Select at least one classification to see detailed patterns")
+        
+        data_summary = summarize_behavior(anomalous_count, high_risk, off_hours, unique_users,
+                                          pattern_types['PATTERN_TYPE'].iat[0])
     else:
         st.info("No behavioral patterns detected for the selected period")
         data_summary = "No behavioral patterns detected in the selected date range."
@@ -640,17 +1153,15 @@ elif page == "🔐 Security Compliance":
     st.title("🔐 Security & Compliance Analysis")
     st.markdown(f"**Date Range:** {start_date.strftime('%b %d')} - {end_date.strftime('%b %d, %Y')}")
     
-    security_df = session.sql(f"""
-        SELECT * FROM {DB_SCHEMA}.VW_SECURITY_COMPLIANCE
-        WHERE LOGIN_DATE BETWEEN '{start_date}' AND '{end_date}'
-        ORDER BY LOGIN_DATE DESC, FAILED_LOGINS DESC
-    """).to_pandas()
+    security_df = load_security(start_date, end_date)
     
     if not security_df.empty:
+        high_risk_mask = security_df['SECURITY_RISK_LEVEL'].str.contains('High Risk', na=False, regex=False)
+        high_risk = int(high_risk_mask.sum())
+        
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            high_risk = len(security_df[security_df['SECURITY_RISK_LEVEL'].str.contains('High Risk', na=False)])
             st.metric("High Risk Users", high_risk)
         
         with col2:
@@ -671,41 +1182,29 @@ elif page == "🔐 Security Compliance":
         
         with col1:
             st.markdown("#### Security Risk Distribution")
-            risk_dist = security_df['SECURITY_RISK_LEVEL'].value_counts().reset_index()
-            risk_dist.columns = ['Risk Level', 'Count']
-            fig = px.pie(risk_dist, names='Risk Level', values='Count',
-                        color='Risk Level',
-                        color_discrete_map={'Low Risk': 'green', 
-                                          'Medium Risk - Some Failed Attempts': 'orange',
-                                          'High Risk - Multiple Failed Logins': 'red'})
-            st.plotly_chart(fig, use_container_width=True)
+            risk_dist = security_df['SECURITY_RISK_LEVEL'].value_counts().rename_axis('Risk Level').reset_index(name='Count')
+            fig = build_security_risk_fig(risk_dist)
+            st.plotly_chart(fig, use_container_width=True, key="security_risk")
         
         with col2:
             st.markdown("#### Failed Logins Over Time")
             daily_failed = security_df.groupby('LOGIN_DATE')['FAILED_LOGINS'].sum().reset_index()
-            fig = px.line(daily_failed, x='LOGIN_DATE', y='FAILED_LOGINS')
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = build_failed_logins_fig(daily_failed)
+            st.plotly_chart(fig, use_container_width=True, key="failed_logins")
         
         st.markdown("---")
         st.markdown("#### High-Risk Users")
         
-        high_risk_df = security_df[security_df['SECURITY_RISK_LEVEL'].str.contains('High Risk', na=False)]
+        high_risk_df = security_df.loc[high_risk_mask]
         
         if not high_risk_df.empty:
-            st.dataframe(high_risk_df[['LOGIN_DATE', 'USER_NAME', 'FAILED_LOGINS',
-                                       'MFA_COMPLIANCE_STATUS', 'PASSWORD_ONLY_LOGINS', 'SECURITY_RISK_LEVEL']],
-                        use_container_width=True, height=300)
+            render_paginated_dataframe(high_risk_df[['LOGIN_DATE', 'USER_NAME', 'FAILED_LOGINS',
+                                                    'MFA_COMPLIANCE_STATUS', 'PASSWORD_ONLY_LOGINS', 'SECURITY_RISK_LEVEL']],
+                                       "security", height=300)
         else:
             st.success("✅ No high-risk users detected!")
         
-        data_summary = f"""
-        Security Summary:
-        - High Risk Users: {high_risk}
-        - Total Failed Login Attempts: {int(total_failed)}
-        - Users without MFA: {mfa_disabled}
-        - Password Issues: {password_issues}
-        """
+        data_summary = summarize_security(high_risk, int(total_failed), mfa_disabled, password_issues)
     else:
         st.info("No security data available for the selected period")
         data_summary = "No security data available in the selected date range."
@@ -717,31 +1216,25 @@ elif page == "💡 Recommendations":
     st.title("💡 Contextual Recommendations")
     st.markdown(f"**Date Range:** {start_date.strftime('%b %d')} - {end_date.strftime('%b %d, %Y')}")
     
-    recs_df = session.sql(f"""
-        SELECT * FROM {DB_SCHEMA}.VW_CONTEXTUAL_RECOMMENDATIONS
-        WHERE EVENT_DATE BETWEEN '{start_date}' AND '{end_date}'
-        ORDER BY 
-            CASE PRIORITY 
-                WHEN 'High Priority' THEN 1 
-                WHEN 'Medium Priority' THEN 2 
-                ELSE 3 
-            END,
-            EVENT_DATE DESC
-    """).to_pandas()
+    rec_counts_df = load_recommendation_counts(start_date, end_date)
     
-    if not recs_df.empty:
+    if not rec_counts_df.empty:
+        # Counts come pre-aggregated from Snowflake and are reused by the metrics, charts and summary
+        priority_counts = rec_counts_df.groupby('PRIORITY', sort=False)['REC_COUNT'].sum()
+        type_counts = rec_counts_df.groupby('RECOMMENDATION_TYPE')['REC_COUNT'].sum().sort_values(ascending=False)
+        high_priority = int(priority_counts.get('High Priority', 0))
+        medium_priority = int(priority_counts.get('Medium Priority', 0))
+        low_priority = int(priority_counts.get('Low Priority', 0))
+        
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            high_priority = len(recs_df[recs_df['PRIORITY'] == 'High Priority'])
             st.metric("High Priority", high_priority, delta="Urgent" if high_priority > 0 else None)
         
         with col2:
-            medium_priority = len(recs_df[recs_df['PRIORITY'] == 'Medium Priority'])
             st.metric("Medium Priority", medium_priority)
         
         with col3:
-            low_priority = len(recs_df[recs_df['PRIORITY'] == 'Low Priority'])
             st.metric("Low Priority", low_priority)
         
         st.markdown("---")
@@ -750,46 +1243,43 @@ elif page == "💡 Recommendations":
         
         with col1:
             st.markdown("#### Recommendations by Type")
-            type_dist = recs_df['RECOMMENDATION_TYPE'].value_counts().reset_index()
-            type_dist.columns = ['Type', 'Count']
-            fig = px.bar(type_dist, x='Count', y='Type', orientation='h')
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            type_dist = type_counts.rename_axis('Type').reset_index(name='Count')
+            fig = build_rec_types_fig(type_dist)
+            st.plotly_chart(fig, use_container_width=True, key="rec_types")
         
         with col2:
             st.markdown("#### Priority Distribution")
-            priority_dist = recs_df['PRIORITY'].value_counts().reset_index()
-            priority_dist.columns = ['Priority', 'Count']
-            fig = px.pie(priority_dist, names='Priority', values='Count',
-                        color='Priority',
-                        color_discrete_map={'High Priority': 'red',
-                                          'Medium Priority': 'orange',
-                                          'Low Priority': 'yellow'})
-            st.plotly_chart(fig, use_container_width=True)
+            priority_dist = priority_counts.rename_axis('Priority').reset_index(name='Count')
+            fig = build_priority_pie_fig(priority_dist)
+            st.plotly_chart(fig, use_container_width=True, key="priority_pie")
         
         st.markdown("---")
         st.markdown("#### All Recommendations")
         
+        priorities = priority_counts.index.tolist()
         priority_filter = st.multiselect("Filter by Priority:",
-                                        options=recs_df['PRIORITY'].unique(),
-                                        default=recs_df['PRIORITY'].unique())
+                                        options=priorities,
+                                        default=priorities)
         
-        filtered_recs = recs_df[recs_df['PRIORITY'].isin(priority_filter)]
+        if priority_filter:
+            filtered_recs = load_recommendations(start_date, end_date, tuple(sorted(priority_filter)))
+            
+            # Render one page of expanders at a time
+            _, _, first_row, last_row = page_bounds(len(filtered_recs), "recommendations", RECOMMENDATIONS_PAGE_SIZE)
+            visible_recs = filtered_recs.iloc[first_row:last_row]
+            
+            for priority, rec_type, user_name, event_date, issue, actions in visible_recs.itertuples(index=False, name=None):
+                priority_icon = PRIORITY_ICONS.get(priority, "⚪")
+                with st.expander(f"{priority_icon} {rec_type} - {user_name} ({event_date})"):
+                    st.markdown(f"**Priority:** {priority}")
+                    st.markdown(f"**Issue:** {issue}")
+                    st.markdown(f"**Recommended Actions:** {actions}")
+            
+            render_page_controls(len(filtered_recs), "recommendations", RECOMMENDATIONS_PAGE_SIZE)
+        else:
+            st.info("Select at least one priority to see recommendations")
         
-        for idx, row in filtered_recs.iterrows():
-            priority_icon = "🔴" if row['PRIORITY'] == 'High Priority' else "🟡" if row['PRIORITY'] == 'Medium Priority' else "🟢"
-            with st.expander(f"{priority_icon} {row['RECOMMENDATION_TYPE']} - {row['USER_NAME']} ({row['EVENT_DATE']})"):
-                st.markdown(f"**Priority:** {row['PRIORITY']}")
-                st.markdown(f"**Issue:** {row['ISSUE_DESCRIPTION']}")
-                st.markdown(f"**Recommended Actions:** {row['RECOMMENDED_ACTIONS']}")
-        
-        data_summary = f"""
-        Recommendations Summary:
-        - High Priority: {high_priority}
-        - Medium Priority: {medium_priority}
-        - Low Priority: {low_priority}
-        - Most Common Type: {recs_df['RECOMMENDATION_TYPE'].value_counts().index[0]}
-        """
+        data_summary = summarize_recommendations(high_priority, medium_priority, low_priority, type_dist['Type'].iat[0])
     else:
         st.success("✅ No recommendations - all systems optimal!")
         data_summary = "No recommendations in the selected date range."
@@ -801,59 +1291,52 @@ elif page == "📊 Data Activity":
     st.title("📊 Data Activity Tracking")
     st.markdown(f"**Date Range:** {start_date.strftime('%b %d')} - {end_date.strftime('%b %d, %Y')}")
     
+    # The three Data Activity queries are independent, so run them concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        consumption_future = executor.submit(load_consumption, start_date, end_date)
+        write_future = executor.submit(load_writes, start_date, end_date)
+        totals_future = executor.submit(load_data_activity_totals, start_date, end_date)
+        consumption_df = consumption_future.result()
+        write_df = write_future.result()
+        activity_totals = totals_future.result().iloc[0]
+    
+    top_consumer_role = top_write_role = 'N/A'
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### Data Consumption by Role")
-        consumption_df = session.sql(f"""
-            SELECT * FROM {DB_SCHEMA}.VW_DATA_CONSUMPTION_BY_ROLE
-            WHERE USAGE_DATE BETWEEN '{start_date}' AND '{end_date}'
-            ORDER BY GB_DATA_SCANNED DESC
-            LIMIT 20
-        """).to_pandas()
         
         if not consumption_df.empty:
-            fig = px.bar(consumption_df, x='GB_DATA_SCANNED', y='ROLE_NAME',
-                        orientation='h', color='GB_DATA_SCANNED',
-                        color_continuous_scale='Blues')
-            fig.update_layout(height=500, showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            # Rows arrive ordered by GB scanned, so the first one is the top consumer
+            top_consumer_role = consumption_df['ROLE_NAME'].iat[0]
+            # Sorted descending, so a zero top value means every bar would be empty
+            if consumption_df['GB_DATA_SCANNED'].iat[0] > 0:
+                fig = build_consumption_fig(consumption_df)
+                st.plotly_chart(fig, use_container_width=True, key="consumption")
+            else:
+                st.caption("No meaningful consumption in range.")
             
-            st.dataframe(consumption_df[['ROLE_NAME', 'TOTAL_QUERIES', 'GB_DATA_SCANNED',
-                                        'ACTIVE_USERS', 'DATABASES_ACCESSED']],
-                        use_container_width=True, height=300)
+            st.dataframe(consumption_df, use_container_width=True, height=300)
         else:
             st.info("No data consumption data available")
     
     with col2:
         st.markdown("#### Data Write Activity by Role")
-        write_df = session.sql(f"""
-            SELECT * FROM {DB_SCHEMA}.VW_DATA_WRITE_ACTIVITY_BY_ROLE
-            WHERE ACTIVITY_DATE BETWEEN '{start_date}' AND '{end_date}'
-            ORDER BY TOTAL_ROWS_INSERTED DESC
-            LIMIT 20
-        """).to_pandas()
         
         if not write_df.empty:
-            fig = px.bar(write_df, x='TOTAL_ROWS_INSERTED', y='ROLE_NAME',
-                        orientation='h', color='TOTAL_ROWS_INSERTED',
-                        color_continuous_scale='Greens')
-            fig.update_layout(height=500, showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            top_write_role = write_df['ROLE_NAME'].iat[0]
+            if write_df['TOTAL_ROWS_INSERTED'].iat[0] > 0:
+                fig = build_writes_fig(write_df)
+                st.plotly_chart(fig, use_container_width=True, key="writes")
+            else:
+                st.caption("No meaningful write activity in range.")
             
-            st.dataframe(write_df[['ROLE_NAME', 'TOTAL_WRITE_QUERIES', 'TOTAL_ROWS_INSERTED',
-                                  'TOTAL_ROWS_UPDATED', 'GB_WRITTEN_DAILY']],
-                        use_container_width=True, height=300)
+            st.dataframe(write_df, use_container_width=True, height=300)
         else:
             st.info("No write activity data available")
     
-    data_summary = f"""
-    Data Activity Summary:
-    - Top Consumer Role: {consumption_df.iloc[0]['ROLE_NAME'] if not consumption_df.empty else 'N/A'}
-    - Total GB Scanned: {consumption_df['GB_DATA_SCANNED'].sum() if not consumption_df.empty else 0:,.2f}
-    - Top Write Role: {write_df.iloc[0]['ROLE_NAME'] if not write_df.empty else 'N/A'}
-    - Total Rows Inserted: {write_df['TOTAL_ROWS_INSERTED'].sum() if not write_df.empty else 0:,.0f}
-    """
+    data_summary = summarize_data_activity(top_consumer_role, float(activity_totals['TOTAL_GB_SCANNED']),
+                                           top_write_role, float(activity_totals['TOTAL_ROWS_INSERTED']))
     
     render_chat_interface("Data Activity", data_summary)
 
@@ -861,34 +1344,40 @@ elif page == "📊 Data Activity":
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📄 Generate Business Report")
 
-with st.sidebar.expander("📊 Create PDF Report", expanded=False):
-    st.markdown("**Select sections to include:**")
+# Rerun only the report widgets when generating, not the whole page
+@fragment
+def render_report_builder(start_date, end_date):
+    with st.expander("📊 Create PDF Report", expanded=False):
+        st.markdown("**Select sections to include:**")
     
-    report_sections = st.multiselect(
-        "Report Sections:",
-        ["Executive Summary", "Unusual Activity", "Resource Costs", "Security & Access", "Action Items"],
-        default=["Executive Summary", "Unusual Activity", "Resource Costs", "Security & Access", "Action Items"],
-        help="Choose which sections to include in your business report"
-    )
+        report_sections = st.multiselect(
+            "Report Sections:",
+            ["Executive Summary", "Unusual Activity", "Resource Costs", "Security & Access", "Action Items"],
+            default=["Executive Summary", "Unusual Activity", "Resource Costs", "Security & Access", "Action Items"],
+            help="Choose which sections to include in your business report"
+        )
     
-    if st.button("📥 Generate PDF Report", type="primary", use_container_width=True):
-        if not report_sections:
-            st.error("Please select at least one section")
-        else:
-            with st.spinner("Generating your business report..."):
-                try:
-                    pdf_buffer = generate_business_report(report_sections, start_date, end_date, session)
+        if st.button("📥 Generate PDF Report", type="primary", use_container_width=True):
+            if not report_sections:
+                st.error("Please select at least one section")
+            else:
+                with st.spinner("Generating your business report..."):
+                    try:
+                        pdf_buffer = generate_business_report(report_sections, start_date, end_date, session)
                     
-                    st.download_button(
-                        label="📥 Download Business Report",
-                        data=pdf_buffer,
-                        file_name=f"Business_Report_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                    st.success("✅ Report generated successfully!")
-                except Exception as e:
-                    st.error(f"Error generating report: {str(e)}")
+                        st.download_button(
+                            label="📥 Download Business Report",
+                            data=pdf_buffer,
+                            file_name=f"Business_Report_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.pdf",
+                            mime="application/pdf",
+                            use_container_width=True
+                        )
+                        st.success("✅ Report generated successfully!")
+                    except Exception as e:
+                        st.error(f"Error generating report: {str(e)}")
+
+with st.sidebar:
+    render_report_builder(start_date, end_date)
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📖 About")